@@ -0,0 +1,297 @@
+import atexit
+from multiprocessing import shared_memory
+import os
+from pathlib import Path
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+import uuid
+
+from PyQt5.QtCore import QThread, pyqtSignal
+from PyQt5.QtGui import QImage
+
+from frame_encoder import encode_spool
+from pools import SPAWN_CONTEXT
+from recorder import BaseSession, RecorderSession, release_grabber
+from spool import read_spool_index, remove_spool
+
+# Frames are handed back to the GUI as RGB previews at the editor's display
+# width, through a ring of fixed-size shared memory slots.
+PREVIEW_WIDTH = 500
+PREVIEW_MAX_HEIGHT = PREVIEW_WIDTH * 2
+PREVIEW_SLOT_SIZE = PREVIEW_WIDTH * PREVIEW_MAX_HEIGHT * 3
+PREVIEW_SLOTS = 8
+
+# How many times a crashed worker is restarted during one recording.
+MAX_RESTARTS = 3
+
+
+def _worker_main(conn, shm_name: str, slot_count: int, output_dir: str, settings: dict, start_index: int,
+                 spool_path: str):
+    """Run a RecorderSession in the worker process, sending previews through the shared memory slots."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    send_lock = threading.Lock()
+    slots_lock = threading.Lock()
+    free_slots = set(range(slot_count))
+
+    def send(*msg):
+        with send_lock:
+            conn.send(msg)
+
+    def on_frame(filename, img):
+        with slots_lock:
+            slot = free_slots.pop() if free_slots else None
+        if slot is None:
+            # The GUI is behind; skip the preview rather than block capture.
+            send("frame", filename, None, 0, 0, session.metadata.get(filename))
+            return
+        preview = img.copy()
+        preview.thumbnail((PREVIEW_WIDTH, PREVIEW_MAX_HEIGHT))
+        data = preview.tobytes()
+        start = slot * PREVIEW_SLOT_SIZE
+        shm.buf[start:start + len(data)] = data
+        send("frame", filename, slot, preview.width, preview.height, session.metadata.get(filename))
+
+    def capture_loop():
+        try:
+            while True:
+                x, y = session.wait_for_click()
+                if x is None and y is None:
+                    break
+                filename = session.capture(x, y)
+                if filename and session.deferred:
+                    send("frame", filename, None, 0, 0, None)
+        finally:
+            release_grabber()
+
+    session = RecorderSession(output_dir, settings, spool_path=spool_path)
+    session.screenshot_count = start_index
+    if not session.deferred:
+        session.frame_callback = on_frame
+    session.start(clear=False)
+    capture_thread = threading.Thread(target=capture_loop, daemon=True)
+    capture_thread.start()
+    send("ready")
+
+    try:
+        while True:
+            try:
+                msg = conn.recv()
+            except EOFError:
+                break
+            if msg[0] == "release":
+                with slots_lock:
+                    free_slots.add(msg[1])
+            elif msg[0] == "capture":
+                session.trigger(msg[1], msg[2])
+            elif msg[0] == "stop":
+                break
+        session.click_queue.put((None, None))
+        capture_thread.join()
+        # Frames the session could not encode stay in its spool for the
+        # parent to retry.
+        session.stop()
+        send("stopped", session.metadata)
+    except (BrokenPipeError, EOFError):
+        pass
+    finally:
+        conn.close()
+        shm.close()
+
+
+class RemoteSession(BaseSession):
+    """Parent-side handle on a capture worker process, restarted if it crashes while recording."""
+
+    def __init__(self, output_dir=None, settings: Optional[dict] = None, slots: int = PREVIEW_SLOTS):
+        super().__init__(output_dir, settings)
+        self.deferred = self.settings.get("deferred_encode", False)
+        self.slots = slots
+        self.restarts = 0
+        # Steps captured this recording whose screenshots could not be saved.
+        self.lost: List[str] = []
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._conn = None
+        self._process = None
+        self._spool_path: Optional[Path] = None
+        self._send_lock = threading.Lock()
+
+    def start(self):
+        self.reset()
+        self.restarts = 0
+        self.lost = []
+        self._shm = shared_memory.SharedMemory(create=True, size=self.slots * PREVIEW_SLOT_SIZE)
+        self._spawn()
+        # The worker is not a daemon (it needs its own encoder pool), so make
+        # sure it is told to stop before multiprocessing joins it at exit.
+        atexit.register(self.stop)
+        print("[*] Capture worker started.")
+
+    def _spawn(self):
+        parent_conn, child_conn = SPAWN_CONTEXT.Pipe()
+        self._spool_path = self.output_dir / f"capture_{uuid.uuid4().hex}.spool"
+        self._process = SPAWN_CONTEXT.Process(
+            target=_worker_main,
+            args=(child_conn, self._shm.name, self.slots, str(self.output_dir), self.settings,
+                  self.screenshot_count, str(self._spool_path)),
+        )
+        self._process.start()
+        child_conn.close()
+        self._conn = parent_conn
+
+    def _send(self, *msg):
+        with self._send_lock:
+            self._conn.send(msg)
+
+    def is_alive(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    def restart(self):
+        """Replace a dead worker, continuing the step numbering; raise RuntimeError after MAX_RESTARTS."""
+        if self.restarts >= MAX_RESTARTS:
+            raise RuntimeError(f"Capture worker crashed {self.restarts + 1} times; giving up.")
+        self.restarts += 1
+        self._close_worker()
+        self._recover_spool()
+        self._spawn()
+        print(f"[*] Capture worker restarted ({self.restarts}/{MAX_RESTARTS}).")
+
+    def _recover_spool(self) -> List[str]:
+        """Encode the frames the last worker left unencoded in its spool; return and record the lost ones."""
+        if self._spool_path is None:
+            return []
+        path, self._spool_path = self._spool_path, None
+        entries = read_spool_index(path)
+        pending = [e for e in entries if e["filename"] not in self.metadata]
+        recovered: Dict[str, dict] = {}
+        if pending:
+            try:
+                recovered = encode_spool(path, pending, self.settings)
+            except Exception as exc:
+                print(f"Error recovering {path}: {exc}")
+            self.metadata.update(recovered)
+            print(f"[*] Recovered {len(recovered)} of {len(pending)} spooled step(s).")
+        lost = [e["filename"] for e in pending if e["filename"] not in recovered]
+        if lost:
+            # Keep the frames on disk rather than discard what was captured.
+            self.lost += lost
+            print(f"Warning: {len(lost)} captured step(s) could not be saved; keeping {path}: "
+                  + ", ".join(os.path.basename(f) for f in lost))
+        else:
+            remove_spool(path)
+        # Continue numbering after every step the dead worker used, whether
+        # or not it had reported it yet.
+        used = [e["filename"] for e in entries] + [str(f) for f in self.output_dir.glob("step_*.png")]
+        for filename in used:
+            match = re.search(r"step_(\d+)\.png$", filename)
+            if match:
+                self.screenshot_count = max(self.screenshot_count, int(match.group(1)) + 1)
+        return lost
+
+    def _handle(self, msg) -> Optional[Tuple[str, Optional[Tuple[int, int, bytes]]]]:
+        """Process one worker message; return (filename, preview) for frames."""
+        if msg[0] != "frame":
+            return None
+        _, filename, slot, width, height, metadata = msg
+        self.screenshot_count += 1
+        if metadata:
+            self.metadata[filename] = metadata
+        preview = None
+        if slot is not None:
+            start = slot * PREVIEW_SLOT_SIZE
+            preview = (width, height, bytes(self._shm.buf[start:start + width * height * 3]))
+            self._send("release", slot)
+        return filename, preview
+
+    def poll(self, timeout: float = 0.1) -> List[Tuple[str, Optional[Tuple[int, int, bytes]]]]:
+        """Return the (filename, preview) frames reported within timeout, restarting a dead worker."""
+        frames = []
+        try:
+            if self._conn.poll(timeout):
+                while True:
+                    frame = self._handle(self._conn.recv())
+                    if frame:
+                        frames.append(frame)
+                    if not self._conn.poll():
+                        break
+            elif not self.is_alive():
+                self.restart()
+        except (EOFError, OSError):
+            self.restart()
+        return frames
+
+    def trigger(self, x: int, y: int):
+        """Ask the worker to capture a step at (x, y)."""
+        self._send("capture", x, y)
+
+    def stop(self) -> List[str]:
+        """Stop the worker after any deferred encoding; return the steps that could not be saved."""
+        if self._shm is None:
+            return list(self.lost)
+        atexit.unregister(self.stop)
+        if self._process is not None:
+            try:
+                self._send("stop")
+                while True:
+                    if not self._conn.poll(0.5):
+                        if not self.is_alive():
+                            print("Warning: capture worker exited before finishing.")
+                            break
+                        continue
+                    msg = self._conn.recv()
+                    if msg[0] == "stopped":
+                        self.metadata.update(msg[1])
+                        break
+                    self._handle(msg)
+            except (EOFError, OSError) as exc:
+                print(f"Warning: lost contact with capture worker: {exc}")
+        self._close_worker()
+        # Retries whatever the worker did not encode, whether it exited
+        # early or reported frames it could not save.
+        self._recover_spool()
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+        print("[*] Capture worker stopped.")
+        return list(self.lost)
+
+    def _close_worker(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        if self._process is not None:
+            self._process.join(timeout=5)
+            if self._process.is_alive():
+                self._process.terminate()
+                self._process.join()
+            self._process = None
+
+
+class WorkerReaderThread(QThread):
+    """Relays frames from a RemoteSession's worker into Qt signals."""
+
+    screenshot_taken = pyqtSignal(str)
+    preview_ready = pyqtSignal(str, QImage)
+    worker_failed = pyqtSignal(str)
+
+    def __init__(self, session: RemoteSession):
+        super().__init__()
+        self.session = session
+        self._running = True
+
+    def run(self):
+        while self._running:
+            try:
+                frames = self.session.poll(0.1)
+            except RuntimeError as exc:
+                self.worker_failed.emit(str(exc))
+                break
+            for filename, preview in frames:
+                self.screenshot_taken.emit(filename)
+                if preview:
+                    width, height, data = preview
+                    image = QImage(data, width, height, width * 3, QImage.Format_RGB888).copy()
+                    self.preview_ready.emit(filename, image)
+
+    def stop(self):
+        self._running = False
+        self.wait()
@@ -0,0 +1,2 @@
+# Lets pytest import the top-level modules (recorder, library, ...) when it
+# is run from any directory.
@@ -1,10 +1,16 @@
 # exporter.py
 from fpdf import FPDF
+import html
 import os
+import re
+import shutil
 from PIL import Image
 import json
 import zipfile
 
+from pools import spawn_pool
+from project_io import image_metadata
+
 # Export functionality
 # Alert colors for PDF export
 ALERT_PDF_COLORS = {
@@ -56,8 +62,11 @@ def export_to_pdf(steps, output_path):
                 pdf.ln(2)
 
             if os.path.exists(step["filename"]):
-                with Image.open(step["filename"]) as img:
-                    orig_w, orig_h = img.size
+                metadata = step.get("metadata") or {}
+                orig_w, orig_h = metadata.get("width"), metadata.get("height")
+                if not orig_w or not orig_h:
+                    with Image.open(step["filename"]) as img:
+                        orig_w, orig_h = img.size
                 scale = page_width / orig_w
                 if max_image_height > 0:
                     scale = min(scale, max_image_height / orig_h)
@@ -107,3 +116,136 @@ def export_to_pdf(steps, output_path):
     except Exception as e:
         print(f"Error exporting PDF: {e}")
         raise
+
+
+# Widths of the downscaled copies written for each step by export_to_html;
+# the original image is always kept as the full-size level.
+HTML_IMAGE_WIDTHS = {"small": 480, "medium": 1024}
+
+# Names of the image files export_to_html writes, including the temporary
+# ".part" files they are written through; only these are ever pruned.
+HTML_IMAGE_NAME = re.compile(r"^[0-9a-f]{16}-(?:small\.jpg|medium\.jpg|full\.\w+)(?:\.part)?$")
+
+HTML_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{title}</title>
+<style>
+body {{ font-family: Arial, sans-serif; max-width: 1000px; margin: 0 auto; padding: 15px; }}
+.step {{ margin-bottom: 40px; }}
+.alert {{ border-radius: 5px; padding: 8px; margin: 8px 0; font-weight: bold; }}
+img {{ max-width: 100%; height: auto; border: 1px solid #ccc; }}
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+{steps}
+</body>
+</html>
+"""
+
+
+def _pyramid_names(key, ext):
+    names = {level: f"{key}-{level}.jpg" for level in HTML_IMAGE_WIDTHS}
+    names["full"] = f"{key}-full{ext}"
+    return names
+
+
+def _render_pyramid(src, names, images_dir):
+    """Write the downscaled and full-size copies of src into images_dir."""
+    # Each file is written under a temporary name and moved into place, so
+    # an interrupted export never leaves a truncated file that a later one
+    # would take as already rendered.
+    with Image.open(src) as img:
+        img = img.convert("RGB")
+        for level, width in HTML_IMAGE_WIDTHS.items():
+            scaled = img.copy()
+            scaled.thumbnail((width, img.height), Image.LANCZOS)
+            path = os.path.join(images_dir, names[level])
+            scaled.save(path + ".part", "JPEG", quality=85, optimize=True)
+            os.replace(path + ".part", path)
+    path = os.path.join(images_dir, names["full"])
+    shutil.copyfile(src, path + ".part")
+    os.replace(path + ".part", path)
+    return src
+
+
+def _alert_html(alert):
+    color = ALERT_PDF_COLORS.get(alert["type"], (128, 128, 128))
+    text_color = "black" if alert["type"] == "Warning" else "white"
+    return (
+        f'<div class="alert" style="background-color: rgb{color}; color: {text_color};">'
+        f"{html.escape(alert['type'])}: {html.escape(alert.get('text', ''))}</div>"
+    )
+
+
+def export_to_html(steps, output_dir, title="Scribe Guide", max_workers=None):
+    """Export the recorded steps to a static HTML page, re-rendering only changed images."""
+    try:
+        images_dir = os.path.join(output_dir, "images")
+        os.makedirs(images_dir, exist_ok=True)
+
+        blocks = []
+        pending = {}
+        referenced = set()
+        for idx, step in enumerate(steps):
+            step_title = step.get("title") or f"Step {idx + 1}"
+            parts = ['<div class="step">', f"<h2>{html.escape(step_title)}</h2>"]
+            parts += [_alert_html(alert) for alert in step.get("alerts_above", [])]
+
+            if os.path.exists(step["filename"]):
+                metadata = image_metadata(step["filename"], step.get("metadata"))
+                width, height = metadata["width"], metadata["height"]
+                ext = os.path.splitext(step["filename"])[1].lower() or ".png"
+                names = _pyramid_names(metadata["sha256"][:16], ext)
+                referenced.update(names.values())
+                if not all(os.path.exists(os.path.join(images_dir, n)) for n in names.values()):
+                    pending[names["full"]] = (step["filename"], names)
+
+                srcset = [
+                    f"images/{names[level]} {level_width}w"
+                    for level, level_width in HTML_IMAGE_WIDTHS.items()
+                    if level_width < width
+                ]
+                srcset.append(f"images/{names['full']} {width}w")
+                medium = names["medium"] if HTML_IMAGE_WIDTHS["medium"] < width else names["full"]
+                # The first screenshot is likely above the fold, so only
+                # later ones are deferred.
+                loading = "eager" if not blocks else "lazy"
+                parts.append(
+                    f'<a href="images/{names["full"]}"><img src="images/{medium}" '
+                    f'srcset="{", ".join(srcset)}" sizes="(max-width: 1000px) 100vw, 1000px" '
+                    f'width="{width}" height="{height}" loading="{loading}" decoding="async" '
+                    f'alt="{html.escape(step_title)}"></a>'
+                )
+
+            parts += [_alert_html(alert) for alert in step.get("alerts_below", [])]
+            parts.append("</div>")
+            blocks.append("\n".join(parts))
+
+        if len(pending) > 1 and max_workers != 1:
+            with spawn_pool(max_workers) as pool:
+                futures = [
+                    pool.submit(_render_pyramid, src, names, images_dir) for src, names in pending.values()
+                ]
+                for future in futures:
+                    future.result()
+        else:
+            for src, names in pending.values():
+                _render_pyramid(src, names, images_dir)
+
+        for name in os.listdir(images_dir):
+            path = os.path.join(images_dir, name)
+            if name not in referenced and HTML_IMAGE_NAME.match(name) and os.path.isfile(path):
+                os.remove(path)
+
+        output_path = os.path.join(output_dir, "index.html")
+        with open(output_path, "w", encoding="utf-8") as fh:
+            fh.write(HTML_TEMPLATE.format(title=html.escape(title), steps="\n".join(blocks)))
+        print(f"HTML exported to {output_path} ({len(pending)} of {len(steps)} steps rendered)")
+        return output_path
+    except Exception as e:
+        print(f"Error exporting HTML: {e}")
+        raise
@@ -0,0 +1,94 @@
+import hashlib
+import io
+import mmap
+from typing import Dict, List, Optional
+
+from PIL import Image, ImageDraw
+
+from pools import spawn_pool
+
+# Only Pillow is needed here, so the spawned encoder processes start without
+# loading Qt, pynput or mss.
+
+
+def draw_highlight(img: Image.Image, x: int, y: int, settings: dict) -> Image.Image:
+    """Draw the click highlight onto img around (x, y) and return it."""
+    # Only the box around the click is alpha-composited, not the whole frame.
+    radius = settings["highlight_size"] // 2
+    color = settings["highlight_color"]
+    pad = radius + 3
+    box = (
+        max(x - pad, 0),
+        max(y - pad, 0),
+        min(x + pad + 1, img.width),
+        min(y + pad + 1, img.height),
+    )
+    if box[0] >= box[2] or box[1] >= box[3]:
+        return img
+
+    region = img.crop(box).convert("RGBA")
+    overlay = Image.new("RGBA", region.size, (0, 0, 0, 0))
+    o_draw = ImageDraw.Draw(overlay)
+    cx, cy = x - box[0], y - box[1]
+    o_draw.ellipse(
+        (cx - radius, cy - radius, cx + radius, cy + radius),
+        fill=tuple(color),
+        outline=tuple(color[:3]) + (255,),
+        width=3,
+    )
+    img.paste(Image.alpha_composite(region, overlay).convert("RGB"), box[:2])
+    return img
+
+
+def encode_png(img: Image.Image, filename) -> str:
+    """Write img to filename as PNG and return the SHA-256 of the bytes written."""
+    # Encode in memory so the content hash is computed without reading the
+    # file back.
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    data = buf.getvalue()
+    with open(filename, "wb") as fh:
+        fh.write(data)
+    return hashlib.sha256(data).hexdigest()
+
+
+# Read-only mapping of the spool file, opened once per encoder process.
+_worker_spool = None
+
+
+def _open_spool(path: str):
+    global _worker_spool
+    with open(path, "rb") as fh:
+        _worker_spool = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _encode_spooled_frame(entry: dict, settings: dict) -> dict:
+    """Encode one spooled BGRA frame to its PNG file and return its metadata."""
+    offset, length = entry["offset"], entry["length"]
+    size = (entry["width"], entry["height"])
+    img = Image.frombytes("RGB", size, _worker_spool[offset:offset + length], "raw", "BGRX")
+    img = draw_highlight(img, entry["click_x"], entry["click_y"], settings)
+    return {
+        "width": img.width,
+        "height": img.height,
+        "sha256": encode_png(img, entry["filename"]),
+        "captured_at": entry["captured_at"],
+        "click_x": entry["click_x"],
+        "click_y": entry["click_y"],
+        "monitor": entry["monitor"],
+    }
+
+
+def encode_spool(path, entries: List[dict], settings: dict, max_workers: Optional[int] = None) -> Dict[str, dict]:
+    """Encode the indexed spool frames to PNG; return metadata by filename for those encoded."""
+    results: Dict[str, dict] = {}
+    if not entries:
+        return results
+    with spawn_pool(max_workers, initializer=_open_spool, initargs=(str(path),)) as pool:
+        futures = [pool.submit(_encode_spooled_frame, entry, settings) for entry in entries]
+        for entry, future in zip(entries, futures):
+            try:
+                results[entry["filename"]] = future.result()
+            except Exception as exc:
+                print(f"Error encoding {entry['filename']}: {exc}")
+    return results
@@ -1,2 +1,2 @@
 from .main_window import run_gui, ScribeApp
-from .dialogs import SettingsDialog
+from .dialogs import SettingsDialog, LibraryDialog
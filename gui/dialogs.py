@@ -1,9 +1,15 @@
+import os
+import sqlite3
+
 from PyQt5.QtWidgets import (
     QDialog, QFormLayout, QSpinBox, QPushButton,
-    QHBoxLayout, QColorDialog, QLineEdit, QFileDialog
+    QHBoxLayout, QColorDialog, QLineEdit, QFileDialog,
+    QVBoxLayout, QListWidget, QListWidgetItem, QLabel, QCheckBox
 )
 from PyQt5.QtGui import QColor
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
 
+from library import ProjectLibrary
 from settings import current_settings
 
 
@@ -46,6 +52,29 @@ class SettingsDialog(QDialog):
 
         layout.addRow("Default Export Path:", export_layout)
 
+        # Library folders
+        library_layout = QHBoxLayout()
+        self.library_paths_edit = QLineEdit()
+        self.library_paths_edit.setText(os.pathsep.join(current_settings["library_paths"]))
+        self.library_paths_edit.setPlaceholderText(f"Folders to index, separated by '{os.pathsep}'")
+        library_layout.addWidget(self.library_paths_edit)
+
+        add_folder_button = QPushButton("Add")
+        add_folder_button.clicked.connect(self.browse_library_path)
+        library_layout.addWidget(add_folder_button)
+
+        layout.addRow("Library Folders:", library_layout)
+
+        # Deferred encoding
+        self.deferred_check = QCheckBox("Encode screenshots when recording stops")
+        self.deferred_check.setChecked(current_settings["deferred_encode"])
+        layout.addRow("Deferred Encoding:", self.deferred_check)
+
+        # Capture worker process
+        self.worker_check = QCheckBox("Capture in a separate process")
+        self.worker_check.setChecked(current_settings["capture_worker"])
+        layout.addRow("Capture Worker:", self.worker_check)
+
         # Buttons
         button_layout = QHBoxLayout()
         ok_button = QPushButton("OK")
@@ -77,9 +106,141 @@ class SettingsDialog(QDialog):
         if folder:
             self.export_path_edit.setText(folder)
 
+    def browse_library_path(self):
+        folder = QFileDialog.getExistingDirectory(self, "Add Library Folder")
+        if folder:
+            paths = [p for p in self.library_paths_edit.text().split(os.pathsep) if p]
+            if folder not in paths:
+                paths.append(folder)
+            self.library_paths_edit.setText(os.pathsep.join(paths))
+
     def get_settings(self):
         return {
             "highlight_size": self.size_spin.value(),
             "highlight_color": self.current_color,
             "export_path": self.export_path_edit.text(),
+            "library_paths": [p for p in self.library_paths_edit.text().split(os.pathsep) if p],
+            "deferred_encode": self.deferred_check.isChecked(),
+            "spool_size_mb": current_settings["spool_size_mb"],
+            "capture_worker": self.worker_check.isChecked(),
         }
+
+
+class LibraryRefreshThread(QThread):
+    """Refreshes the library index off the GUI thread."""
+
+    refreshed = pyqtSignal(dict)
+    failed = pyqtSignal(str)
+
+    def __init__(self, folders, db_path):
+        super().__init__()
+        self.folders = folders
+        self.db_path = db_path
+
+    def run(self):
+        # sqlite connections belong to the thread that opened them.
+        try:
+            library = ProjectLibrary(self.folders, self.db_path)
+            try:
+                counts = library.refresh()
+            finally:
+                library.close()
+        except Exception as exc:
+            self.failed.emit(str(exc))
+        else:
+            self.refreshed.emit(counts)
+
+
+class LibraryDialog(QDialog):
+    """Search the indexed project library and pick a project to open."""
+
+    def __init__(self, folders, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Project Library")
+        self.resize(600, 400)
+        self.selected_path = None
+
+        self.library = ProjectLibrary(folders)
+        self.refresh_thread = None
+
+        layout = QVBoxLayout(self)
+
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("Search titles, alerts and metadata...")
+        self.search_edit.textChanged.connect(self.run_search)
+        layout.addWidget(self.search_edit)
+
+        self.results = QListWidget()
+        self.results.itemDoubleClicked.connect(self.open_selected)
+        layout.addWidget(self.results)
+
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+
+        button_layout = QHBoxLayout()
+        self.refresh_button = QPushButton("Refresh")
+        self.refresh_button.clicked.connect(self.refresh)
+        button_layout.addWidget(self.refresh_button)
+        open_button = QPushButton("Open")
+        open_button.clicked.connect(self.open_selected)
+        button_layout.addWidget(open_button)
+        cancel_button = QPushButton("Cancel")
+        cancel_button.clicked.connect(self.reject)
+        button_layout.addWidget(cancel_button)
+        layout.addLayout(button_layout)
+
+        self.refresh()
+
+    def refresh(self):
+        if self.refresh_thread is not None:
+            return
+        self.refresh_button.setEnabled(False)
+        self.status_label.setText("Updating library...")
+        self.run_search(self.search_edit.text())
+        self.refresh_thread = LibraryRefreshThread(self.library.folders, self.library.db_path)
+        self.refresh_thread.refreshed.connect(self.on_refreshed)
+        self.refresh_thread.failed.connect(self.on_refresh_failed)
+        self.refresh_thread.finished.connect(self.on_refresh_finished)
+        self.refresh_thread.start()
+
+    def on_refreshed(self, counts):
+        self.status_label.setText(
+            f"{counts['indexed']} indexed, {counts['unchanged']} unchanged, "
+            f"{counts['removed']} removed, {counts['failed']} skipped"
+        )
+
+    def on_refresh_failed(self, message):
+        self.status_label.setText(f"Failed to refresh library: {message}")
+
+    def on_refresh_finished(self):
+        self.refresh_thread = None
+        self.refresh_button.setEnabled(True)
+        self.run_search(self.search_edit.text())
+
+    def run_search(self, text):
+        self.results.clear()
+        try:
+            hits = self.library.search(text)
+        except sqlite3.Error as exc:
+            # The refresh thread may hold the database briefly.
+            self.status_label.setText(f"Search failed: {exc}")
+            return
+        for hit in hits:
+            label = f"{os.path.basename(hit['path'])} - step {hit['step'] + 1}: {hit['snippet']}"
+            item = QListWidgetItem(label)
+            item.setToolTip(hit["path"])
+            item.setData(Qt.UserRole, hit["path"])
+            self.results.addItem(item)
+
+    def open_selected(self, *args):
+        item = self.results.currentItem()
+        if item is None:
+            return
+        self.selected_path = item.data(Qt.UserRole)
+        self.accept()
+
+    def done(self, result):
+        if self.refresh_thread is not None:
+            self.refresh_thread.wait()
+        self.library.close()
+        super().done(result)
@@ -1,20 +1,23 @@
 import os
+import shutil
 import sys
-import threading
+import tempfile
 
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QPushButton, QLabel,
     QMessageBox, QScrollArea, QLineEdit, QHBoxLayout, QFrame,
-    QInputDialog, QTextEdit, QFileDialog
+    QInputDialog, QTextEdit, QFileDialog, QDialog
 )
 from PyQt5.QtGui import QPixmap, QFont
 from PyQt5.QtCore import Qt, QTimer
 
+import capture_worker
 import recorder
 import settings
-from export import export_to_pdf
+from export import export_to_pdf, export_to_html
+from project_diff import diff_projects, export_diff_pdf, summarize
 from project_io import save_project, load_project
-from .dialogs import SettingsDialog
+from .dialogs import SettingsDialog, LibraryDialog
 
 ALERT_STYLES = {
     "Alert": "background-color: #f44336; color: white; border-radius: 5px; padding: 8px; font-weight: bold;",
@@ -28,11 +31,13 @@ class ScribeApp(QWidget):
     def __init__(self):
         super().__init__()
         self.capture_thread = None
-        self.recording_thread = None
+        self.session = None
         self.recording_timer = QTimer()
         self.recording_timer.timeout.connect(self.update_recording_status)
         self.recording_time = 0
         self.step_data = []
+        # Editor-sized pixmaps handed back by the capture worker, by filename.
+        self.previews = {}
 
         self.setWindowTitle("Local Scribe Tool")
         self.setGeometry(100, 100, 400, 200)
@@ -75,34 +80,69 @@ class ScribeApp(QWidget):
         load_button.clicked.connect(self.load_project_dialog)
         layout.addWidget(load_button)
 
+        library_button = QPushButton("\U0001f50d Search Library")
+        library_button.clicked.connect(self.show_library)
+        layout.addWidget(library_button)
+
+        compare_button = QPushButton("\U0001f500 Compare Projects")
+        compare_button.clicked.connect(self.compare_projects_dialog)
+        layout.addWidget(compare_button)
+
         settings_button = QPushButton("\u2699\ufe0f Settings")
         settings_button.clicked.connect(self.show_settings)
         layout.addWidget(settings_button)
 
     # Recording control
     def start_recording(self):
-        self.capture_thread = recorder.CaptureThread(settings.current_settings)
+        self.previews = {}
+        self.clear_screenshot_dir()
+        if settings.current_settings["capture_worker"]:
+            self.session = capture_worker.RemoteSession(recorder.SCREENSHOT_DIR, settings.current_settings)
+            self.session.start()
+            self.capture_thread = capture_worker.WorkerReaderThread(self.session)
+            self.capture_thread.preview_ready.connect(self.store_preview)
+            self.capture_thread.worker_failed.connect(self.capture_worker_failed)
+        else:
+            self.session = recorder.RecorderSession(recorder.SCREENSHOT_DIR, settings.current_settings)
+            self.session.start()
+            self.capture_thread = recorder.CaptureThread(self.session)
         self.capture_thread.start()
         self.recording_time = 0
         self.status_label.setText("\U0001f534 Recording... Click anywhere to capture steps")
         self.record_button.setEnabled(False)
         self.stop_button.setEnabled(True)
 
-        self.recording_thread = threading.Thread(target=recorder.start_recording, daemon=True)
-        self.recording_thread.start()
-
         self.recording_timer.start(1000)
 
+    def store_preview(self, filename, image):
+        self.previews[filename] = QPixmap.fromImage(image)
+
+    def capture_worker_failed(self, message):
+        QMessageBox.critical(self, "Capture Error", f"The capture worker stopped:\n{message}")
+        self.stop_recording()
+
     def update_recording_status(self):
         self.recording_time += 1
         self.status_label.setText(f"\U0001f534 Recording... ({self.recording_time}s) Click to capture steps")
 
     def stop_recording(self):
-        recorder.stop_recording()
+        # Let the capture thread drain before the session stops, so a
+        # deferred-encode session has every frame spooled before encoding.
         if self.capture_thread:
             self.capture_thread.stop()
             self.capture_thread = None
         self.recording_timer.stop()
+        if self.session:
+            if self.session.deferred:
+                self.status_label.setText("Recording stopped. Encoding screenshots...")
+                QApplication.processEvents()
+            lost = self.session.stop()
+            if lost:
+                QMessageBox.warning(
+                    self, "Capture Error",
+                    f"{len(lost)} captured step(s) could not be saved:\n"
+                    + "\n".join(os.path.basename(f) for f in lost),
+                )
         self.status_label.setText("Recording stopped. Loading editor...")
         self.record_button.setEnabled(True)
         self.stop_button.setEnabled(False)
@@ -119,7 +159,7 @@ class ScribeApp(QWidget):
         scroll_layout = QVBoxLayout()
 
         self.step_data = []
-        folder = recorder.SCREENSHOT_DIR
+        folder = self.session.output_dir if self.session else recorder.SCREENSHOT_DIR
         if folder.exists():
             filenames = sorted(f.name for f in folder.glob("*.png"))
             for name in filenames:
@@ -138,6 +178,10 @@ class ScribeApp(QWidget):
         export_btn.clicked.connect(self.export_pdf)
         button_layout.addWidget(export_btn)
 
+        html_btn = QPushButton("\U0001f310 Export HTML")
+        html_btn.clicked.connect(self.export_html)
+        button_layout.addWidget(html_btn)
+
         save_btn = QPushButton("\U0001f4be Save Project")
         save_btn.clicked.connect(self.save_project)
         button_layout.addWidget(save_btn)
@@ -164,7 +208,9 @@ class ScribeApp(QWidget):
 
         label = QLabel()
         if os.path.exists(image_path):
-            pixmap = QPixmap(image_path).scaledToWidth(500, Qt.SmoothTransformation)
+            pixmap = self.previews.get(image_path)
+            if pixmap is None or pixmap.width() != 500:
+                pixmap = QPixmap(image_path).scaledToWidth(500, Qt.SmoothTransformation)
             label.setPixmap(pixmap)
             label.setAlignment(Qt.AlignCenter)
         layout.addWidget(label)
@@ -179,7 +225,8 @@ class ScribeApp(QWidget):
             "title_widget": title_input,
             "layout": layout,
             "alerts_above": [],
-            "alerts_below": []
+            "alerts_below": [],
+            "metadata": dict(self.session.metadata.get(image_path, {})) if self.session else {},
         }
         self.step_data.append(step_data)
         return frame
@@ -214,6 +261,15 @@ class ScribeApp(QWidget):
                 break
 
     # Export/Save/Load helpers
+    def sync_step_text(self):
+        """Copy the edited titles and alert text from the widgets into step_data."""
+        for step in self.step_data:
+            step["title"] = step["title_widget"].text()
+            for alert in step["alerts_above"]:
+                alert["text"] = alert["widget"].toPlainText()
+            for alert in step["alerts_below"]:
+                alert["text"] = alert["widget"].toPlainText()
+
     def export_pdf(self):
         try:
             default_name = "scribe_export.pdf"
@@ -224,32 +280,41 @@ class ScribeApp(QWidget):
             file_path, _ = QFileDialog.getSaveFileName(self, "Export PDF", default_path, "PDF files (*.pdf)")
             if not file_path:
                 return
-            for step in self.step_data:
-                step["title"] = step["title_widget"].text()
-                for alert in step["alerts_above"]:
-                    alert["text"] = alert["widget"].toPlainText()
-                for alert in step["alerts_below"]:
-                    alert["text"] = alert["widget"].toPlainText()
+            self.sync_step_text()
             export_to_pdf(self.step_data, file_path)
             QMessageBox.information(self, "Export Complete", f"PDF exported to:\n{file_path}")
         except Exception as e:
             QMessageBox.critical(self, "Export Error", f"Failed to export PDF:\n{e}")
 
+    def export_html(self):
+        try:
+            default_dir = settings.current_settings["export_path"] or ""
+            folder = QFileDialog.getExistingDirectory(self, "Export HTML To Folder", default_dir)
+            if not folder:
+                return
+            if os.path.exists(os.path.join(folder, "index.html")):
+                answer = QMessageBox.question(
+                    self, "Export HTML", f"{folder} already contains index.html.\nOverwrite it?"
+                )
+                if answer != QMessageBox.Yes:
+                    return
+            self.sync_step_text()
+            output_path = export_to_html(self.step_data, folder)
+            QMessageBox.information(self, "Export Complete", f"HTML exported to:\n{output_path}")
+        except Exception as e:
+            QMessageBox.critical(self, "Export Error", f"Failed to export HTML:\n{e}")
+
     def save_project(self):
         try:
-            for step in self.step_data:
-                step["title"] = step["title_widget"].text()
-                for alert in step["alerts_above"]:
-                    alert["text"] = alert["widget"].toPlainText()
-                for alert in step["alerts_below"]:
-                    alert["text"] = alert["widget"].toPlainText()
+            self.sync_step_text()
             save_project(self.step_data, "scribe_project.zip")
             QMessageBox.information(self, "Project Saved", "Project saved as 'scribe_project.zip'")
         except Exception as e:
             QMessageBox.critical(self, "Save Error", f"Failed to save project:\n{e}")
 
-    def load_project_dialog(self):
-        file_path, _ = QFileDialog.getOpenFileName(self, "Load Project", "", "Zip files (*.zip)")
+    def load_project_dialog(self, file_path=None):
+        if not file_path:
+            file_path, _ = QFileDialog.getOpenFileName(self, "Load Project", "", "Zip files (*.zip)")
         if file_path:
             try:
                 self.step_data = load_project(file_path, extract_to=str(recorder.SCREENSHOT_DIR))
@@ -257,6 +322,49 @@ class ScribeApp(QWidget):
             except Exception as e:
                 QMessageBox.critical(self, "Load Error", f"Failed to load project:\n{e}")
 
+    def show_library(self):
+        folders = settings.current_settings["library_paths"]
+        if not folders:
+            QMessageBox.information(self, "Project Library", "Add library folders in Settings first.")
+            return
+        dlg = LibraryDialog(folders, self)
+        if dlg.exec_() == QDialog.Accepted and dlg.selected_path:
+            self.load_project_dialog(dlg.selected_path)
+
+    def compare_projects_dialog(self):
+        old_path, _ = QFileDialog.getOpenFileName(self, "Select Previous Version", "", "Zip files (*.zip)")
+        if not old_path:
+            return
+        new_path, _ = QFileDialog.getOpenFileName(self, "Select New Version", "", "Zip files (*.zip)")
+        if not new_path:
+            return
+        temp_dir = tempfile.mkdtemp(prefix="scribe_diff_")
+        try:
+            old_steps = load_project(old_path, extract_to=os.path.join(temp_dir, "old"))
+            new_steps = load_project(new_path, extract_to=os.path.join(temp_dir, "new"))
+            entries = diff_projects(old_steps, new_steps)
+            counts = summarize(entries)
+            summary = "\n".join(f"{status.capitalize()}: {count}" for status, count in counts.items())
+            if counts["unchanged"] == len(entries):
+                QMessageBox.information(self, "Compare Projects", f"No differences found.\n\n{summary}")
+                return
+            answer = QMessageBox.question(
+                self, "Compare Projects", f"{summary}\n\nExport the changed steps to a PDF?"
+            )
+            if answer != QMessageBox.Yes:
+                return
+            default_name = "scribe_changes.pdf"
+            if settings.current_settings["export_path"]:
+                default_name = os.path.join(settings.current_settings["export_path"], default_name)
+            file_path, _ = QFileDialog.getSaveFileName(self, "Export Changes", default_name, "PDF files (*.pdf)")
+            if file_path:
+                export_diff_pdf(entries, old_steps, new_steps, file_path)
+                QMessageBox.information(self, "Export Complete", f"Changes exported to:\n{file_path}")
+        except Exception as e:
+            QMessageBox.critical(self, "Compare Error", f"Failed to compare projects:\n{e}")
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
     def show_loaded_editor(self):
         self.clear_layout()
         self.setWindowTitle("Loaded Project Editor")
@@ -280,6 +388,10 @@ class ScribeApp(QWidget):
         export_btn.clicked.connect(self.export_pdf)
         button_layout.addWidget(export_btn)
 
+        html_btn = QPushButton("\U0001f310 Export HTML")
+        html_btn.clicked.connect(self.export_html)
+        button_layout.addWidget(html_btn)
+
         save_btn = QPushButton("\U0001f4be Save Project")
         save_btn.clicked.connect(self.save_project)
         button_layout.addWidget(save_btn)
@@ -330,19 +442,17 @@ class ScribeApp(QWidget):
         return frame
 
     def new_recording(self):
-        folder = recorder.SCREENSHOT_DIR
-        if folder.exists():
-            for file in folder.glob("*.png"):
-                file.unlink()
-
-        self.step_data = []
-        recorder.screenshot_count = 0
-
         if self.capture_thread:
             self.capture_thread.stop()
             self.capture_thread = None
 
-        recorder.clear_click_queue()
+        if self.session:
+            self.session.stop()
+            self.session = None
+        self.clear_screenshot_dir()
+
+        self.step_data = []
+        self.previews = {}
 
         self.setWindowTitle("Local Scribe Tool")
         self.init_main_ui()
@@ -355,6 +465,16 @@ class ScribeApp(QWidget):
             settings.save_settings(settings.current_settings)
 
     # Utility
+    def clear_screenshot_dir(self):
+        """Remove the screenshots of the previous recording or loaded project."""
+        folder = recorder.SCREENSHOT_DIR
+        if folder.exists():
+            for file in folder.glob("*.png"):
+                try:
+                    file.unlink()
+                except Exception as exc:
+                    print(f"Warning: could not remove {file}: {exc}")
+
     def clear_layout(self, layout=None):
         if layout is None:
             layout = self.layout()
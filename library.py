@@ -0,0 +1,180 @@
+import os
+import re
+import sqlite3
+import time
+import zipfile
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from project_io import file_sha256, read_manifest
+
+LIBRARY_DB = Path("library.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    path TEXT PRIMARY KEY,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    step_count INTEGER NOT NULL,
+    indexed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS failed (
+    path TEXT PRIMARY KEY,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS steps USING fts5(
+    path UNINDEXED,
+    step_index UNINDEXED,
+    title,
+    alerts,
+    metadata,
+    tokenize = 'unicode61'
+);
+"""
+
+
+def _check_manifest(manifest) -> None:
+    """Raise ValueError unless manifest has the shape save_project writes."""
+    if not isinstance(manifest, dict) or not isinstance(manifest.get("steps", []), list):
+        raise ValueError("manifest is not a project manifest")
+    for step in manifest.get("steps", []):
+        if not isinstance(step, dict):
+            raise ValueError("manifest step is not an object")
+        for key in ("alerts_above", "alerts_below"):
+            alerts = step.get(key, [])
+            if not isinstance(alerts, list) or not all(isinstance(a, dict) for a in alerts):
+                raise ValueError(f"manifest step has malformed {key}")
+        if not isinstance(step.get("metadata") or {}, dict):
+            raise ValueError("manifest step has malformed metadata")
+
+
+class ProjectLibrary:
+    """Full-text index over the manifests of the project archives in folders."""
+
+    def __init__(self, folders: Iterable[str], db_path: Optional[str] = None):
+        self.folders = [os.path.abspath(os.path.expanduser(f)) for f in folders if f]
+        self.db_path = str(db_path or LIBRARY_DB)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def _archives(self) -> Iterable[str]:
+        for folder in self.folders:
+            for root, _dirs, files in os.walk(folder):
+                for name in files:
+                    if name.lower().endswith(".zip"):
+                        yield os.path.join(root, name)
+
+    def refresh(self) -> Dict[str, int]:
+        """Bring the index up to date and return counts of what was done."""
+        counts = {"indexed": 0, "unchanged": 0, "removed": 0, "failed": 0}
+        known = {
+            row[0]: (row[1], row[2], row[3])
+            for row in self.conn.execute("SELECT path, mtime, size, sha256 FROM projects")
+        }
+        failed = {row[0]: (row[1], row[2]) for row in self.conn.execute("SELECT path, mtime, size FROM failed")}
+        seen = set()
+        with self.conn:
+            for path in self._archives():
+                seen.add(path)
+                stat = None
+                try:
+                    stat = os.stat(path)
+                    if failed.get(path) == (stat.st_mtime, stat.st_size):
+                        # Failed before and not changed since; don't re-read it.
+                        counts["failed"] += 1
+                        continue
+                    previous = known.get(path)
+                    if previous and previous[0] == stat.st_mtime and previous[1] == stat.st_size:
+                        counts["unchanged"] += 1
+                        continue
+                    digest = file_sha256(path)
+                    if previous and previous[2] == digest:
+                        # Touched but not modified: just record the new stat.
+                        self.conn.execute(
+                            "UPDATE projects SET mtime = ?, size = ? WHERE path = ?",
+                            (stat.st_mtime, stat.st_size, path),
+                        )
+                        counts["unchanged"] += 1
+                        continue
+                    manifest = read_manifest(path)
+                    _check_manifest(manifest)
+                except (OSError, KeyError, ValueError, zipfile.BadZipFile) as exc:
+                    # Not a project archive (or unreadable); skip it.
+                    if path in known:
+                        self._remove(path)
+                    if stat is not None:
+                        self.conn.execute(
+                            "INSERT OR REPLACE INTO failed (path, mtime, size) VALUES (?, ?, ?)",
+                            (path, stat.st_mtime, stat.st_size),
+                        )
+                    counts["failed"] += 1
+                    print(f"Skipping {path}: {exc}")
+                    continue
+                self._index(path, stat, digest, manifest)
+                counts["indexed"] += 1
+
+            for path in known:
+                if path not in seen and self._in_folders(path):
+                    self._remove(path)
+                    counts["removed"] += 1
+            for path in failed:
+                if path not in seen and self._in_folders(path):
+                    self.conn.execute("DELETE FROM failed WHERE path = ?", (path,))
+        return counts
+
+    def _in_folders(self, path: str) -> bool:
+        return any(path.startswith(folder + os.sep) for folder in self.folders)
+
+    def _remove(self, path: str) -> None:
+        self.conn.execute("DELETE FROM steps WHERE path = ?", (path,))
+        self.conn.execute("DELETE FROM projects WHERE path = ?", (path,))
+
+    def _index(self, path: str, stat: os.stat_result, digest: str, manifest: Dict) -> None:
+        self.conn.execute("DELETE FROM steps WHERE path = ?", (path,))
+        self.conn.execute("DELETE FROM failed WHERE path = ?", (path,))
+        rows = []
+        for idx, step in enumerate(manifest.get("steps", [])):
+            alerts = step.get("alerts_above", []) + step.get("alerts_below", [])
+            alert_text = "\n".join(f"{a.get('type', '')}: {a.get('text', '')}" for a in alerts)
+            metadata = step.get("metadata") or {}
+            meta_text = " ".join(
+                [step.get("filename", "")]
+                + [f"{key}:{value}" for key, value in metadata.items() if value is not None]
+            )
+            rows.append((path, idx, step.get("title", ""), alert_text, meta_text))
+        self.conn.executemany(
+            "INSERT INTO steps (path, step_index, title, alerts, metadata) VALUES (?, ?, ?, ?, ?)",
+            rows,
+        )
+        self.conn.execute(
+            "INSERT OR REPLACE INTO projects (path, mtime, size, sha256, step_count, indexed_at)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (path, stat.st_mtime, stat.st_size, digest, len(rows), time.time()),
+        )
+
+    def search(self, query: str, limit: int = 50) -> List[Dict]:
+        """Return the best matching steps under the configured folders, most relevant first."""
+        terms = re.findall(r"\w+", query)
+        if not terms or not self.folders:
+            return []
+        # Quote every term so user input cannot inject FTS5 syntax, and
+        # prefix-match the last one so results update while typing.
+        match = " ".join(f'"{t}"' for t in terms[:-1])
+        match = f'{match} "{terms[-1]}"*'.strip()
+        prefixes = [folder + os.sep for folder in self.folders]
+        folder_filter = " OR ".join("substr(path, 1, ?) = ?" for _ in prefixes)
+        folder_args = [arg for prefix in prefixes for arg in (len(prefix), prefix)]
+        cursor = self.conn.execute(
+            "SELECT path, step_index, title, snippet(steps, -1, '[', ']', '...', 8)"
+            f" FROM steps WHERE steps MATCH ? AND ({folder_filter}) ORDER BY bm25(steps) LIMIT ?",
+            (match, *folder_args, limit),
+        )
+        return [
+            {"path": path, "step": int(step), "title": title, "snippet": snippet}
+            for path, step, title, snippet in cursor
+        ]
@@ -1,4 +1,9 @@
-from gui import run_gui
+import multiprocessing
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    # Imported here so spawned worker processes, which re-import this
+    # module, don't load the GUI.
+    from gui import run_gui
+
     run_gui()
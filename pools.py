@@ -0,0 +1,11 @@
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+# Worker processes are spawned rather than forked: the GUI process runs Qt
+# and pynput threads, which a forked child would inherit in a broken state.
+SPAWN_CONTEXT = multiprocessing.get_context("spawn")
+
+
+def spawn_pool(max_workers=None, **kwargs) -> ProcessPoolExecutor:
+    """Return a process pool whose workers are spawned, not forked."""
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=SPAWN_CONTEXT, **kwargs)
@@ -0,0 +1,194 @@
+import difflib
+import os
+from typing import Dict, Hashable, List, Optional
+
+import numpy as np
+from PIL import Image
+
+from export import export_to_pdf
+from pools import spawn_pool
+from project_io import file_sha256
+
+# Steps are compared on a SIGNATURE_SIZE x SIGNATURE_SIZE greyscale thumbnail.
+SIGNATURE_SIZE = 32
+
+# Minimum correlation between signatures for two steps with different
+# images to be treated as the same step re-recorded rather than as one
+# removed and one added step.
+DEFAULT_THRESHOLD = 0.9
+
+STATUS_LABELS = {
+    "edited": "Edited",
+    "changed": "Changed",
+    "added": "Added",
+    "removed": "Removed",
+}
+
+
+def _step_key(step: Dict) -> Hashable:
+    """Return the content hash of a step's image, or a unique key if the image is missing."""
+    metadata = step.get("metadata") or {}
+    if metadata.get("sha256"):
+        return metadata["sha256"]
+    if os.path.exists(step["filename"]):
+        return file_sha256(step["filename"])
+    return object()
+
+
+def _signature(path: str) -> np.ndarray:
+    """Return a zero-mean, unit-norm greyscale thumbnail of the image at path."""
+    size = (SIGNATURE_SIZE, SIGNATURE_SIZE)
+    try:
+        with Image.open(path) as img:
+            # Lets JPEG decode at reduced scale; other formats ignore it.
+            img.draft("L", (SIGNATURE_SIZE * 4, SIGNATURE_SIZE * 4))
+            thumb = img.convert("L").resize(size, Image.BOX)
+    except OSError:
+        return np.zeros(SIGNATURE_SIZE * SIGNATURE_SIZE, dtype=np.float32)
+    vec = np.asarray(thumb, dtype=np.float32).ravel()
+    vec -= vec.mean()
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+def _signatures(paths: List[str], max_workers: Optional[int] = None) -> np.ndarray:
+    if not paths:
+        return np.zeros((0, SIGNATURE_SIZE * SIGNATURE_SIZE), dtype=np.float32)
+    if len(paths) < 8:
+        return np.stack([_signature(p) for p in paths])
+    with spawn_pool(max_workers) as pool:
+        return np.stack(list(pool.map(_signature, paths, chunksize=16)))
+
+
+def _align(similarity: np.ndarray, threshold: float) -> List[tuple]:
+    """Return the order-preserving (i, j) pairs at or above threshold with the largest total similarity."""
+    # A weighted LCS; each DP row is one numpy running maximum.
+    n, m = similarity.shape
+    weights = np.where(similarity >= threshold, similarity, 0.0)
+    dp = np.zeros((n + 1, m + 1), dtype=np.float64)
+    for i in range(1, n + 1):
+        candidates = np.maximum(dp[i - 1, 1:], dp[i - 1, :-1] + weights[i - 1])
+        dp[i, 1:] = np.maximum.accumulate(candidates)
+
+    pairs = []
+    i, j = n, m
+    while i > 0 and j > 0:
+        if dp[i, j] == dp[i - 1, j]:
+            i -= 1
+        elif dp[i, j] == dp[i, j - 1]:
+            j -= 1
+        else:
+            pairs.append((i - 1, j - 1))
+            i -= 1
+            j -= 1
+    pairs.reverse()
+    return pairs
+
+
+def _alert_pairs(alerts: List[Dict]) -> List[tuple]:
+    return [(alert["type"], alert.get("text", "")) for alert in alerts]
+
+
+def _text_changes(old: Dict, new: Dict) -> Dict:
+    """Return {field: (old_value, new_value)} for the text that differs."""
+    changes = {}
+    if old.get("title", "") != new.get("title", ""):
+        changes["title"] = (old.get("title", ""), new.get("title", ""))
+    for key in ("alerts_above", "alerts_below"):
+        before = _alert_pairs(old.get(key, []))
+        after = _alert_pairs(new.get(key, []))
+        if before != after:
+            changes[key] = (before, after)
+    return changes
+
+
+def diff_projects(old_steps: List[Dict], new_steps: List[Dict], threshold: float = DEFAULT_THRESHOLD,
+                  max_workers: Optional[int] = None) -> List[Dict]:
+    """Align the steps of two project versions and return one status entry per aligned step."""
+    # Steps are matched by content hash first, so only the unmatched ones
+    # are decoded and paired by image similarity.
+    old_hashes = [_step_key(step) for step in old_steps]
+    new_hashes = [_step_key(step) for step in new_steps]
+    matcher = difflib.SequenceMatcher(None, old_hashes, new_hashes, autojunk=False)
+
+    def matched(i, j, similarity, same_image):
+        changes = _text_changes(old_steps[i], new_steps[j])
+        if same_image:
+            status = "edited" if changes else "unchanged"
+        else:
+            status = "changed"
+        return {"status": status, "old": i, "new": j, "similarity": similarity, "text_changes": changes}
+
+    opcodes = matcher.get_opcodes()
+    pending = [op for op in opcodes if op[0] == "replace"]
+    old_paths = [old_steps[i]["filename"] for _, i1, i2, _, _ in pending for i in range(i1, i2)]
+    new_paths = [new_steps[j]["filename"] for _, _, _, j1, j2 in pending for j in range(j1, j2)]
+    old_sigs = _signatures(old_paths, max_workers)
+    new_sigs = _signatures(new_paths, max_workers)
+
+    entries = []
+    old_offset = new_offset = 0
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == "equal":
+            entries += [matched(i1 + k, j1 + k, 1.0, True) for k in range(i2 - i1)]
+            continue
+        if tag == "delete":
+            entries += [{"status": "removed", "old": i, "new": None, "similarity": None, "text_changes": {}}
+                        for i in range(i1, i2)]
+            continue
+        if tag == "insert":
+            entries += [{"status": "added", "old": None, "new": j, "similarity": None, "text_changes": {}}
+                        for j in range(j1, j2)]
+            continue
+
+        block_old = old_sigs[old_offset:old_offset + i2 - i1]
+        block_new = new_sigs[new_offset:new_offset + j2 - j1]
+        old_offset += i2 - i1
+        new_offset += j2 - j1
+        similarity = block_old @ block_new.T
+        i, j = i1, j1
+        for a, b in _align(similarity, threshold) + [(i2 - i1, j2 - j1)]:
+            entries += [{"status": "removed", "old": k, "new": None, "similarity": None, "text_changes": {}}
+                        for k in range(i, i1 + a)]
+            entries += [{"status": "added", "old": None, "new": k, "similarity": None, "text_changes": {}}
+                        for k in range(j, j1 + b)]
+            if a < i2 - i1:
+                entries.append(matched(i1 + a, j1 + b, float(similarity[a, b]), False))
+            i, j = i1 + a + 1, j1 + b + 1
+    return entries
+
+
+def summarize(entries: List[Dict]) -> Dict[str, int]:
+    """Return the number of entries with each status."""
+    counts = {status: 0 for status in ("unchanged", "edited", "changed", "added", "removed")}
+    for entry in entries:
+        counts[entry["status"]] += 1
+    return counts
+
+
+def export_diff_pdf(entries: List[Dict], old_steps: List[Dict], new_steps: List[Dict], output_path: str) -> int:
+    """Export only the steps that differ to a PDF and return how many were written."""
+    steps = []
+    for entry in entries:
+        if entry["status"] == "unchanged":
+            continue
+        if entry["status"] == "removed":
+            source, index = old_steps[entry["old"]], entry["old"]
+        else:
+            source, index = new_steps[entry["new"]], entry["new"]
+        step = dict(source)
+        title = source.get("title") or f"Step {index + 1}"
+        step["title"] = f"[{STATUS_LABELS[entry['status']]}] {title}"
+        notes = []
+        for field, (before, after) in entry["text_changes"].items():
+            if field == "title":
+                notes.append({"type": "Note", "text": f"Title was: {before}"})
+            else:
+                place = "above" if field == "alerts_above" else "below"
+                was = "; ".join(f"{kind}: {text}" for kind, text in before) or "none"
+                notes.append({"type": "Note", "text": f"Alerts {place} were: {was}"})
+        step["alerts_below"] = list(source.get("alerts_below", [])) + notes
+        steps.append(step)
+    if steps:
+        export_to_pdf(steps, output_path)
+    return len(steps)
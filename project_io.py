@@ -1,19 +1,53 @@
+import hashlib
 import json
 import os
 import zipfile
 from pathlib import Path
 from typing import List, Dict, Optional
 
+MANIFEST_VERSION = "1.1"
+
+# Keys recorded for every step so layout, dedup and integrity checks can work
+# from the manifest alone without decoding the images.
+METADATA_KEYS = ("width", "height", "sha256", "captured_at", "click_x", "click_y", "monitor")
+
+
+def file_sha256(path: str) -> str:
+    """Return the hex SHA-256 digest of the file at path."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def image_metadata(path: str, metadata: Optional[Dict] = None) -> Dict:
+    """Return step metadata for the image at path, filling in missing size and hash fields."""
+    result = {key: None for key in METADATA_KEYS}
+    if metadata:
+        result.update({k: v for k, v in metadata.items() if v is not None})
+    if not os.path.exists(path):
+        return result
+    if result["width"] is None or result["height"] is None:
+        from PIL import Image
+
+        with Image.open(path) as img:
+            result["width"], result["height"] = img.size
+    if result["sha256"] is None:
+        result["sha256"] = file_sha256(path)
+    return result
+
 
 def save_project(steps: List[Dict], output_path: str) -> None:
     """Save a list of step dictionaries to a zip file."""
-    manifest = {"version": "1.0", "steps": []}
+    manifest = {"version": MANIFEST_VERSION, "steps": []}
     for step in steps:
         step_data = {
             "filename": os.path.basename(step["filename"]),
             "title": step.get("title", ""),
-            "alerts_above": step.get("alerts_above", []),
-            "alerts_below": step.get("alerts_below", []),
+            "alerts_above": _plain_alerts(step.get("alerts_above", [])),
+            "alerts_below": _plain_alerts(step.get("alerts_below", [])),
+            "metadata": image_metadata(step["filename"], step.get("metadata")),
         }
         manifest["steps"].append(step_data)
 
@@ -24,6 +58,18 @@ def save_project(steps: List[Dict], output_path: str) -> None:
                 zf.write(step["filename"], os.path.basename(step["filename"]))
 
 
+def _plain_alerts(alerts: List[Dict]) -> List[Dict]:
+    """Strip GUI-only keys (such as the editor widget) from alert dicts."""
+    return [{"type": alert["type"], "text": alert.get("text", "")} for alert in alerts]
+
+
+def read_manifest(zip_path: str) -> Dict:
+    """Return the parsed manifest of a project archive without extracting images."""
+    with zipfile.ZipFile(zip_path, "r") as zf:
+        with zf.open("manifest.json") as mf:
+            return json.load(mf)
+
+
 def load_project(zip_path: str, extract_to: Optional[str] = None) -> List[Dict]:
     """Load a project from a zip archive and return the steps list."""
     steps = []
@@ -40,10 +86,15 @@ def load_project(zip_path: str, extract_to: Optional[str] = None) -> List[Dict]:
                 dest_dir = os.path.dirname(zip_path)
                 zf.extract(filename, path=dest_dir)
                 file_path = os.path.join(dest_dir, filename)
+            # Projects saved before version 1.1 carry no metadata; leave the
+            # fields empty rather than decoding every image on load.
+            metadata = {key: None for key in METADATA_KEYS}
+            metadata.update(step.get("metadata") or {})
             steps.append({
                 "filename": file_path,
                 "title": step.get("title", ""),
                 "alerts_above": step.get("alerts_above", []),
                 "alerts_below": step.get("alerts_below", []),
+                "metadata": metadata,
             })
     return steps
@@ -1,117 +1,241 @@
+import copy
+import os
 from pathlib import Path
 import queue
-from typing import Optional
+import tempfile
+import threading
+import time
+import uuid
+from typing import Dict, Iterable, List, Optional, Tuple
 
 from mss import mss
-from PIL import Image, ImageDraw
+from PIL import Image
 from pynput import mouse
 from PyQt5.QtCore import QThread, pyqtSignal
 
+from frame_encoder import draw_highlight, encode_png, encode_spool
 from settings import current_settings
+from spool import FrameSpool
 
 SCREENSHOT_DIR = Path("screenshots")
 SCREENSHOT_DIR.mkdir(exist_ok=True)
 
-screenshot_count = 0
-mouse_listener = None
-is_recording = False
-click_queue: queue.Queue = queue.Queue()
+# mss handles are not thread-safe, but opening one per capture is slow, so
+# each capturing thread keeps its own.
+_grabbers = threading.local()
+
+
+def _grabber():
+    sct = getattr(_grabbers, "sct", None)
+    if sct is None:
+        sct = _grabbers.sct = mss()
+    return sct
+
+
+def release_grabber():
+    """Close the calling thread's mss handle, if it has one."""
+    sct = getattr(_grabbers, "sct", None)
+    if sct is not None:
+        sct.close()
+        _grabbers.sct = None
+
+
+class BaseSession:
+    """Output folder, settings snapshot and recorded steps shared by the session types."""
+
+    def __init__(self, output_dir=None, settings: Optional[dict] = None):
+        if output_dir is None:
+            output_dir = tempfile.mkdtemp(prefix="session_", dir=SCREENSHOT_DIR)
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.settings = copy.deepcopy(settings if settings is not None else current_settings)
+        self.screenshot_count = 0
+        # Per-step metadata recorded at capture time, keyed by screenshot path.
+        self.metadata: Dict[str, dict] = {}
+
+    def reset(self):
+        """Discard the screenshots this session recorded and start numbering from zero."""
+        recorded = list(self.metadata)
+        self.screenshot_count = 0
+        self.metadata.clear()
+        for f in recorded:
+            try:
+                os.remove(f)
+            except FileNotFoundError:
+                pass
+            except Exception as exc:
+                print(f"Warning: could not remove {f}: {exc}")
+
+
+class RecorderSession(BaseSession):
+    """One recording with its own click queue, step counter, output folder and settings."""
+
+    def __init__(self, output_dir=None, settings: Optional[dict] = None, monitor: int = 1,
+                 deferred: Optional[bool] = None, spool_path=None):
+        super().__init__(output_dir, settings)
+        self.monitor = monitor
+        self.click_queue: queue.Queue = queue.Queue()
+        self.is_recording = False
+        self.mouse_listener = None
+        if deferred is None:
+            deferred = self.settings.get("deferred_encode", False)
+        self.deferred = deferred
+        self.spool: Optional[FrameSpool] = None
+        self.spool_path = Path(spool_path or self.output_dir / f"capture_{uuid.uuid4().hex}.spool")
+        # Optional callable(filename, image) invoked after each immediately
+        # encoded capture, e.g. to hand a preview to another process.
+        self.frame_callback = None
+        self._lock = threading.RLock()
+
+    def clear_click_queue(self):
+        while True:
+            try:
+                self.click_queue.get_nowait()
+            except queue.Empty:
+                break
 
+    def _next_filename(self) -> Path:
+        with self._lock:
+            index = self.screenshot_count
+            self.screenshot_count += 1
+        return self.output_dir / f"step_{index:03d}.png"
 
-def clear_click_queue():
-    while True:
+    def capture(self, x: int, y: int) -> Optional[str]:
+        """Capture the screen and highlight the given click position."""
+        # stop() releases the calling thread's mss handle; other capturing
+        # threads must call release_grabber() themselves.
         try:
-            click_queue.get_nowait()
-        except queue.Empty:
-            break
-
-
-def capture_click(x: int, y: int, settings: Optional[dict] = None) -> Optional[str]:
-    """Capture the screen and highlight the given click position."""
-    global screenshot_count
-    if settings is None:
-        settings = current_settings
-    try:
-        with mss() as sct:
-            monitor = sct.monitors[1]
-            screenshot = sct.grab(monitor)
+            captured_at = time.time()
+            sct = _grabber()
+            screenshot = sct.grab(sct.monitors[self.monitor])
+            if self.deferred:
+                return self._spool_frame(screenshot, x, y, captured_at)
             img = Image.frombytes("RGB", screenshot.size, screenshot.rgb)
-
-            radius = settings["highlight_size"] // 2
-            color = settings["highlight_color"]
-
-            overlay = Image.new("RGBA", img.size, (0, 0, 0, 0))
-            o_draw = ImageDraw.Draw(overlay)
-            o_draw.ellipse(
-                (x - radius, y - radius, x + radius, y + radius),
-                fill=tuple(color),
-                outline=tuple(color[:3]) + (255,),
-                width=3,
-            )
-            img = Image.alpha_composite(img.convert("RGBA"), overlay).convert("RGB")
-
-            filename = SCREENSHOT_DIR / f"step_{screenshot_count:03d}.png"
-            img.save(filename)
-            screenshot_count += 1
+            img = draw_highlight(img, x, y, self.settings)
+
+            filename = self._next_filename()
+            sha256 = encode_png(img, filename)
+            with self._lock:
+                self.metadata[str(filename)] = {
+                    "width": img.width,
+                    "height": img.height,
+                    "sha256": sha256,
+                    "captured_at": captured_at,
+                    "click_x": x,
+                    "click_y": y,
+                    "monitor": self.monitor,
+                }
+            if self.frame_callback:
+                self.frame_callback(str(filename), img)
             return str(filename)
-    except Exception as exc:
-        print(f"Error capturing screenshot: {exc}")
-        return None
-
-
-def on_click(x, y, button, pressed):
-    global is_recording
-    if pressed and is_recording and button == mouse.Button.left:
-        click_queue.put((x, y))
-
-
-def wait_for_click():
-    return click_queue.get()
-
-
-def start_recording():
-    global mouse_listener, is_recording, screenshot_count
-    clear_click_queue()
-    for f in SCREENSHOT_DIR.glob("*.png"):
-        try:
-            f.unlink()
         except Exception as exc:
-            print(f"Warning: could not remove {f}: {exc}")
-    screenshot_count = 0
-    is_recording = True
-    mouse_listener = mouse.Listener(on_click=on_click)
-    mouse_listener.start()
-    print("[*] Recording started. Click around to capture steps!")
-
-
-def stop_recording():
-    global mouse_listener, is_recording
-    is_recording = False
-    if mouse_listener:
-        mouse_listener.stop()
-        mouse_listener = None
+            print(f"Error capturing screenshot: {exc}")
+            return None
+
+    def _spool_frame(self, screenshot, x: int, y: int, captured_at: float) -> str:
+        with self._lock:
+            if self.spool is None:
+                capacity = int(self.settings.get("spool_size_mb", 256)) * 1024 * 1024
+                self.spool = FrameSpool(self.spool_path, capacity)
+            filename = self._next_filename()
+            self.spool.append(screenshot.raw, {
+                "filename": str(filename),
+                "width": screenshot.width,
+                "height": screenshot.height,
+                "captured_at": captured_at,
+                "click_x": x,
+                "click_y": y,
+                "monitor": self.monitor,
+            })
+        return str(filename)
+
+    def encode_spooled(self, max_workers: Optional[int] = None) -> List[str]:
+        """Encode the spooled frames to PNG, keeping the spool if any fail; return those filenames."""
+        with self._lock:
+            spool, self.spool = self.spool, None
+        if spool is None:
+            return []
+        metadata: Dict[str, dict] = {}
+        try:
+            spool.flush()
+            metadata = encode_spool(spool.path, spool.entries, self.settings, max_workers)
+            with self._lock:
+                self.metadata.update(metadata)
+        finally:
+            lost = [e["filename"] for e in spool.entries if e["filename"] not in metadata]
+            if lost:
+                print(f"Warning: {len(lost)} step(s) could not be encoded; keeping {spool.path}.")
+            spool.close(remove=not lost)
+        return lost
+
+    def capture_many(self, points: Iterable[Tuple[int, int]]) -> List[Optional[str]]:
+        """Capture one step for each (x, y) in points, in order."""
+        return [self.capture(x, y) for x, y in points]
+
+    def trigger(self, x: int, y: int):
+        """Queue a synthetic click, as if the user had clicked at (x, y)."""
+        self.click_queue.put((x, y))
+
+    def on_click(self, x, y, button, pressed):
+        if pressed and self.is_recording and button == mouse.Button.left:
+            self.click_queue.put((x, y))
+
+    def wait_for_click(self):
+        return self.click_queue.get()
+
+    def reset(self):
+        self.clear_click_queue()
+        with self._lock:
+            spool, self.spool = self.spool, None
+            super().reset()
+        if spool is not None:
+            spool.close()
+
+    def start(self, listen: bool = True, clear: bool = True):
+        """Start recording; listen=False captures only scripted clicks, clear=False keeps numbering."""
+        if clear:
+            self.reset()
+        self.is_recording = True
+        if listen:
+            self.mouse_listener = mouse.Listener(on_click=self.on_click)
+            self.mouse_listener.start()
+        print(f"[*] Recording started in {self.output_dir}. Click around to capture steps!")
+
+    def stop(self) -> List[str]:
+        """Stop recording and return the filenames of any steps that could not be encoded."""
+        self.is_recording = False
+        if self.mouse_listener:
+            self.mouse_listener.stop()
+            self.mouse_listener = None
+        release_grabber()
         print("[*] Recording stopped.")
-    clear_click_queue()
+        self.clear_click_queue()
+        if self.deferred:
+            return self.encode_spooled()
+        return []
 
 
 class CaptureThread(QThread):
     screenshot_taken = pyqtSignal(str)
 
-    def __init__(self, settings: dict):
+    def __init__(self, session: RecorderSession):
         super().__init__()
-        self.settings = settings
+        self.session = session
         self._running = True
 
     def run(self):
-        while self._running:
-            x, y = wait_for_click()
-            if x is None and y is None:
-                break
-            filename = capture_click(x, y, self.settings)
-            if filename:
-                self.screenshot_taken.emit(filename)
+        try:
+            while self._running:
+                x, y = self.session.wait_for_click()
+                if x is None and y is None:
+                    break
+                filename = self.session.capture(x, y)
+                if filename:
+                    self.screenshot_taken.emit(filename)
+        finally:
+            release_grabber()
 
     def stop(self):
         self._running = False
-        click_queue.put((None, None))
+        self.session.click_queue.put((None, None))
         self.wait()
@@ -6,6 +6,10 @@ DEFAULT_SETTINGS = {
     "highlight_size": 40,
     "highlight_color": (255, 0, 0, 128),
     "export_path": os.path.expanduser("~/Documents"),
+    "library_paths": [],
+    "deferred_encode": False,
+    "spool_size_mb": 256,
+    "capture_worker": False,
 }
 
 CONFIG_PATH = Path("configs.json")
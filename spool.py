@@ -0,0 +1,78 @@
+import json
+import mmap
+import os
+from typing import List, Optional
+
+
+class FrameSpool:
+    """Preallocated memory-mapped file of raw frames, indexed in ``<path>.idx`` for recovery."""
+
+    def __init__(self, path, capacity: int):
+        self.path = str(path)
+        self.index_path = self.path + ".idx"
+        self.capacity = max(capacity, mmap.PAGESIZE)
+        self.size = 0
+        self.entries: List[dict] = []
+        self._fh = open(self.path, "w+b")
+        self._fh.truncate(self.capacity)
+        self._mm = mmap.mmap(self._fh.fileno(), self.capacity)
+        self._index_fh = open(self.index_path, "w", encoding="utf-8")
+
+    def append(self, data, record: Optional[dict] = None) -> int:
+        """Copy data to the end of the spool, index record (if given) and return the offset."""
+        length = len(data)
+        if self.size + length > self.capacity:
+            capacity = self.capacity
+            while self.size + length > capacity:
+                capacity *= 2
+            self._mm.close()
+            self._fh.truncate(capacity)
+            self._mm = mmap.mmap(self._fh.fileno(), capacity)
+            self.capacity = capacity
+        offset = self.size
+        self._mm[offset:offset + length] = data
+        self.size += length
+        if record is not None:
+            entry = dict(record, offset=offset, length=length)
+            self.entries.append(entry)
+            # The frame is already in the shared mapping, so once this line
+            # reaches the OS it survives the process being killed.
+            self._index_fh.write(json.dumps(entry) + "\n")
+            self._index_fh.flush()
+        return offset
+
+    def flush(self):
+        self._mm.flush()
+
+    def close(self, remove: bool = True):
+        self._mm.close()
+        self._fh.close()
+        self._index_fh.close()
+        if remove:
+            remove_spool(self.path)
+
+
+def read_spool_index(path) -> List[dict]:
+    """Return the records indexed for the spool at path, ignoring a torn final line."""
+    entries = []
+    try:
+        with open(str(path) + ".idx", "r", encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    break
+    except FileNotFoundError:
+        pass
+    return entries
+
+
+def remove_spool(path):
+    """Delete the spool at path and its index file."""
+    for name in (str(path), str(path) + ".idx"):
+        try:
+            os.remove(name)
+        except FileNotFoundError:
+            pass
+        except OSError as exc:
+            print(f"Warning: could not remove {name}: {exc}")
@@ -0,0 +1,82 @@
+import os
+from multiprocessing import shared_memory
+
+import pytest
+
+pytest.importorskip("PIL")
+pytest.importorskip("mss")
+pytest.importorskip("pynput")
+pytest.importorskip("PyQt5.QtGui")
+
+import capture_worker  # noqa: E402
+from spool import FrameSpool  # noqa: E402
+
+SETTINGS = {"highlight_size": 10, "highlight_color": [255, 0, 0, 128], "deferred_encode": True}
+
+
+def spool_frames(session, names, corrupt=()):
+    """Write the spool a crashed worker would have left for names."""
+    session._spool_path = session.output_dir / "capture_dead.spool"
+    spool = FrameSpool(session._spool_path, 1024)
+    for name in names:
+        width = 10 if name in corrupt else 40
+        spool.append(bytes([0, 100, 200, 255]) * (width * 30), {
+            "filename": str(session.output_dir / name),
+            "width": 40, "height": 30, "captured_at": 0.0,
+            "click_x": 5, "click_y": 5, "monitor": 1,
+        })
+    spool.close(remove=False)
+    return str(session._spool_path)
+
+
+def test_recover_spool_encodes_frames_and_continues_numbering(tmp_path):
+    session = capture_worker.RemoteSession(tmp_path, SETTINGS)
+    path = spool_frames(session, ["step_000.png", "step_001.png", "step_002.png"])
+
+    assert session._recover_spool() == []
+    assert sorted(os.path.basename(f) for f in session.metadata) == ["step_000.png", "step_001.png", "step_002.png"]
+    assert all(os.path.exists(f) for f in session.metadata)
+    assert session.screenshot_count == 3
+    assert not os.path.exists(path) and not os.path.exists(path + ".idx")
+
+
+def test_recover_spool_keeps_the_spool_when_frames_are_lost(tmp_path):
+    session = capture_worker.RemoteSession(tmp_path, SETTINGS)
+    path = spool_frames(session, ["step_000.png", "step_001.png"], corrupt={"step_001.png"})
+
+    lost = session._recover_spool()
+    assert lost == session.lost == [str(tmp_path / "step_001.png")]
+    assert list(session.metadata) == [str(tmp_path / "step_000.png")]
+    assert os.path.exists(path) and os.path.exists(path + ".idx")
+    assert session.screenshot_count == 2
+
+
+def test_restart_respawns_after_losing_steps(tmp_path, monkeypatch):
+    session = capture_worker.RemoteSession(tmp_path, SETTINGS)
+    spool_frames(session, ["step_004.png"], corrupt={"step_004.png"})
+    spawned = []
+    monkeypatch.setattr(session, "_spawn", lambda: spawned.append(session.screenshot_count))
+
+    session.restart()
+    assert spawned == [5]
+    assert session.lost == [str(tmp_path / "step_004.png")]
+
+
+def test_handle_reads_previews_and_releases_slots(tmp_path):
+    session = capture_worker.RemoteSession(tmp_path, SETTINGS, slots=2)
+    session._shm = shared_memory.SharedMemory(create=True, size=2 * capture_worker.PREVIEW_SLOT_SIZE)
+    sent = []
+    session._send = lambda *msg: sent.append(msg)
+    try:
+        start = capture_worker.PREVIEW_SLOT_SIZE
+        session._shm.buf[start:start + 12] = bytes(range(12))
+        filename, preview = session._handle(("frame", "a.png", 1, 2, 2, {"width": 800}))
+        assert (filename, preview) == ("a.png", (2, 2, bytes(range(12))))
+        assert sent == [("release", 1)]
+        assert session._handle(("frame", "b.png", None, 0, 0, None)) == ("b.png", None)
+        assert session._handle(("ready",)) is None
+        assert session.screenshot_count == 2
+        assert session.metadata == {"a.png": {"width": 800}}
+    finally:
+        session._shm.close()
+        session._shm.unlink()
@@ -0,0 +1,82 @@
+import os
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+pytest.importorskip("fpdf")
+
+import export  # noqa: E402
+from project_io import file_sha256  # noqa: E402
+
+
+def make_steps(tmp_path, colors):
+    steps = []
+    for i, color in enumerate(colors):
+        path = tmp_path / f"step_{i:03d}.png"
+        Image.new("RGB", (1200, 700), color).save(path)
+        steps.append({"filename": str(path), "title": f"Step {i}"})
+    return steps
+
+
+@pytest.fixture
+def renders(monkeypatch):
+    rendered = []
+    real_render = export._render_pyramid
+
+    def counting_render(src, names, images_dir):
+        rendered.append(src)
+        return real_render(src, names, images_dir)
+
+    monkeypatch.setattr(export, "_render_pyramid", counting_render)
+    return rendered
+
+
+def test_reexport_renders_only_changed_steps(tmp_path, renders):
+    out = tmp_path / "site"
+    steps = make_steps(tmp_path, ["red", "green", "blue"])
+    export.export_to_html(steps, str(out), max_workers=1)
+    assert len(renders) == 3
+    assert len(os.listdir(out / "images")) == 9
+
+    renders.clear()
+    export.export_to_html(steps, str(out), max_workers=1)
+    assert renders == []
+
+    Image.new("RGB", (1200, 700), "yellow").save(steps[1]["filename"])
+    export.export_to_html(steps, str(out), max_workers=1)
+    assert renders == [steps[1]["filename"]]
+    html = (out / "index.html").read_text()
+    images = sorted(os.listdir(out / "images"))
+    assert len(images) == 9
+    assert all(name in html for name in images)
+
+
+def test_prune_removes_stale_images_and_keeps_foreign_files(tmp_path, renders):
+    out = tmp_path / "site"
+    steps = make_steps(tmp_path, ["red", "green"])
+    export.export_to_html(steps, str(out), max_workers=1)
+    images = out / "images"
+    removed_key = file_sha256(steps[0]["filename"])[:16]
+    (images / "holiday.jpg").write_bytes(b"mine")
+    (images / f"{removed_key}-notes.txt").write_bytes(b"mine too")
+    (images / "extra").mkdir()
+    (images / "extra" / f"{removed_key}-small.jpg").write_bytes(b"nested")
+    (images / "0123456789abcdef-small.jpg.part").write_bytes(b"interrupted")
+
+    export.export_to_html(steps[1:], str(out), max_workers=1)
+
+    names = set(os.listdir(images))
+    assert not {name for name in names if name.startswith(f"{removed_key}-") and name.endswith((".jpg", ".png"))}
+    assert "0123456789abcdef-small.jpg.part" not in names
+    assert {"holiday.jpg", f"{removed_key}-notes.txt", "extra"} <= names
+    assert (images / "extra" / f"{removed_key}-small.jpg").exists()
+    assert len(names) == 3 + 3
+
+
+def test_pool_render_writes_every_level(tmp_path):
+    out = tmp_path / "site"
+    steps = make_steps(tmp_path, ["red", "green", "blue"])
+    export.export_to_html(steps, str(out), max_workers=2)
+    names = os.listdir(out / "images")
+    assert len(names) == 9
+    assert not [name for name in names if name.endswith(".part")]
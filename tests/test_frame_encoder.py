@@ -0,0 +1,30 @@
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+from frame_encoder import encode_spool  # noqa: E402
+from project_io import file_sha256  # noqa: E402
+from spool import FrameSpool, read_spool_index  # noqa: E402
+
+SETTINGS = {"highlight_size": 10, "highlight_color": [255, 0, 0, 128]}
+
+
+def test_encode_spool_writes_pngs_from_bgra_frames(tmp_path):
+    spool = FrameSpool(tmp_path / "capture.spool", 1024)
+    for i in range(3):
+        spool.append(bytes([i * 50, 100, 200, 255]) * (40 * 30), {
+            "filename": str(tmp_path / f"step_{i:03d}.png"),
+            "width": 40, "height": 30, "captured_at": float(i),
+            "click_x": 5, "click_y": 5, "monitor": 1,
+        })
+    spool.close(remove=False)
+
+    metadata = encode_spool(spool.path, read_spool_index(spool.path), SETTINGS, max_workers=2)
+
+    assert sorted(metadata) == [str(tmp_path / f"step_{i:03d}.png") for i in range(3)]
+    for filename, meta in metadata.items():
+        assert meta["sha256"] == file_sha256(filename)
+        with Image.open(filename) as img:
+            assert img.size == (40, 30)
+            # BGRA (i*50, 100, 200) is RGB (200, 100, i*50) away from the highlight.
+            assert img.getpixel((39, 29))[:2] == (200, 100)
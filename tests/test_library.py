@@ -0,0 +1,104 @@
+import json
+import os
+import zipfile
+
+from library import ProjectLibrary
+
+
+def write_project(path, titles, alerts=()):
+    manifest = {
+        "version": "1.1",
+        "steps": [
+            {
+                "filename": f"step_{i:03d}.png",
+                "title": title,
+                "alerts_above": [{"type": "Note", "text": text} for text in alerts],
+                "alerts_below": [],
+                "metadata": {"width": 800, "height": 600},
+            }
+            for i, title in enumerate(titles)
+        ],
+    }
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("manifest.json", json.dumps(manifest))
+
+
+def make_library(tmp_path, *folders):
+    return ProjectLibrary([str(tmp_path / f) for f in folders], db_path=str(tmp_path / "library.db"))
+
+
+def test_search_matches_titles_alerts_and_prefixes(tmp_path):
+    (tmp_path / "a").mkdir()
+    write_project(tmp_path / "a" / "one.zip", ["Open the Settings dialog", "Click Save"])
+    write_project(tmp_path / "a" / "two.zip", ["Print"], alerts=["Printer must be online"])
+    library = make_library(tmp_path, "a")
+    assert library.refresh()["indexed"] == 2
+
+    hits = library.search("settings dia")
+    assert [(os.path.basename(h["path"]), h["step"]) for h in hits] == [("one.zip", 0)]
+    assert {os.path.basename(h["path"]) for h in library.search("printer")} == {"two.zip"}
+    # FTS5 syntax in user input is treated as plain words.
+    assert library.search('save" OR "print') == []
+    assert library.search("NEAR(") == []
+    assert library.search("   ") == []
+
+
+def test_refresh_skips_unchanged_and_drops_deleted(tmp_path):
+    (tmp_path / "a").mkdir()
+    write_project(tmp_path / "a" / "one.zip", ["First"])
+    write_project(tmp_path / "a" / "two.zip", ["Second"])
+    library = make_library(tmp_path, "a")
+    library.refresh()
+
+    os.utime(tmp_path / "a" / "one.zip")
+    assert library.refresh() == {"indexed": 0, "unchanged": 2, "removed": 0, "failed": 0}
+
+    write_project(tmp_path / "a" / "one.zip", ["Renamed"])
+    os.remove(tmp_path / "a" / "two.zip")
+    assert library.refresh() == {"indexed": 1, "unchanged": 0, "removed": 1, "failed": 0}
+    assert library.search("renamed") and not library.search("first") and not library.search("second")
+
+
+def test_refresh_counts_malformed_archives_as_failed(tmp_path):
+    (tmp_path / "a").mkdir()
+    write_project(tmp_path / "a" / "good.zip", ["Good"])
+    with zipfile.ZipFile(tmp_path / "a" / "list.zip", "w") as zf:
+        zf.writestr("manifest.json", json.dumps([1, 2]))
+    with zipfile.ZipFile(tmp_path / "a" / "steps.zip", "w") as zf:
+        zf.writestr("manifest.json", json.dumps({"steps": [1, 2]}))
+    (tmp_path / "a" / "junk.zip").write_bytes(b"not a zip")
+    library = make_library(tmp_path, "a")
+
+    assert library.refresh() == {"indexed": 1, "unchanged": 0, "removed": 0, "failed": 3}
+    assert library.search("good")
+
+
+def test_search_ignores_folders_no_longer_configured(tmp_path):
+    for folder in ("a", "b"):
+        (tmp_path / folder).mkdir()
+        write_project(tmp_path / folder / "guide.zip", [f"Shared title {folder}"])
+    make_library(tmp_path, "a", "b").refresh()
+
+    library = make_library(tmp_path, "b")
+    assert {os.path.dirname(h["path"]) for h in library.search("shared")} == {str(tmp_path / "b")}
+
+
+def test_failed_archives_are_not_reread_until_they_change(tmp_path, monkeypatch):
+    import library as library_module
+
+    (tmp_path / "a").mkdir()
+    junk = tmp_path / "a" / "junk.zip"
+    junk.write_bytes(b"not a zip")
+    library = make_library(tmp_path, "a")
+    assert library.refresh()["failed"] == 1
+
+    hashed = []
+    real_sha256 = library_module.file_sha256
+    monkeypatch.setattr(library_module, "file_sha256", lambda path: hashed.append(path) or real_sha256(path))
+    assert library.refresh()["failed"] == 1
+    assert hashed == []
+
+    write_project(junk, ["Fixed"])
+    assert library.refresh() == {"indexed": 1, "unchanged": 0, "removed": 0, "failed": 0}
+    assert hashed == [str(junk)]
+    assert library.search("fixed")
@@ -0,0 +1,54 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("PIL")
+pytest.importorskip("fpdf")
+
+from project_diff import _align, diff_projects, summarize  # noqa: E402
+
+
+def step(name, sha256=None, title=""):
+    return {"filename": f"/nonexistent/{name}.png", "title": title, "metadata": {"sha256": sha256}}
+
+
+def test_align_matches_diagonal():
+    assert _align(np.eye(3), 0.9) == [(0, 0), (1, 1), (2, 2)]
+
+
+def test_align_ignores_pairs_below_threshold():
+    similarity = np.array([[0.95, 0.2], [0.3, 0.5]])
+    assert _align(similarity, 0.9) == [(0, 0)]
+    assert _align(np.zeros((2, 3)), 0.9) == []
+
+
+def test_align_preserves_order():
+    # Swapped steps cannot both be matched without crossing.
+    similarity = np.array([[0.1, 0.95], [0.97, 0.1]])
+    assert _align(similarity, 0.9) == [(1, 0)]
+
+
+def test_align_maximises_total_similarity():
+    # (0, 1) alone scores 0.99, but (0, 0) + (1, 1) scores 1.86.
+    similarity = np.array([[0.91, 0.99], [0.0, 0.95]])
+    assert _align(similarity, 0.9) == [(0, 0), (1, 1)]
+
+
+def test_diff_by_hash_reports_edits_additions_and_removals():
+    old = [step("a", "h1", "Open"), step("b", "h2", "Click"), step("c", "h3", "Close")]
+    new = [step("a", "h1", "Open"), step("b", "h2", "Click OK"), step("d", "h4", "New"), step("c", "h3", "Close")]
+    entries = diff_projects(old, new)
+    assert [(e["status"], e["old"], e["new"]) for e in entries] == [
+        ("unchanged", 0, 0),
+        ("edited", 1, 1),
+        ("added", None, 2),
+        ("unchanged", 2, 3),
+    ]
+    assert entries[1]["text_changes"] == {"title": ("Click", "Click OK")}
+
+
+def test_missing_images_are_never_unchanged():
+    old = [step("a", "h1"), step("missing")]
+    new = [step("a", "h1"), step("missing")]
+    counts = summarize(diff_projects(old, new))
+    assert counts["unchanged"] == 1
+    assert counts["removed"] == 1 and counts["added"] == 1
@@ -0,0 +1,74 @@
+import json
+import zipfile
+
+import pytest
+
+from project_io import METADATA_KEYS, file_sha256, load_project, read_manifest, save_project
+
+
+def write_image_bytes(path, data=b"not really a png"):
+    path.write_bytes(data)
+    return str(path)
+
+
+def full_metadata(**overrides):
+    metadata = {
+        "width": 800,
+        "height": 600,
+        "sha256": "abc123",
+        "captured_at": 1700000000.5,
+        "click_x": 10,
+        "click_y": 20,
+        "monitor": 1,
+    }
+    metadata.update(overrides)
+    return metadata
+
+
+def test_round_trip_keeps_metadata_and_strips_gui_keys(tmp_path):
+    image = write_image_bytes(tmp_path / "step_000.png")
+    steps = [{
+        "filename": image,
+        "title": "Open the menu",
+        "alerts_above": [{"type": "Tip", "text": "Be quick", "widget": object()}],
+        "alerts_below": [{"type": "Note", "widget": object()}],
+        "metadata": full_metadata(),
+    }]
+    archive = str(tmp_path / "project.zip")
+    save_project(steps, archive)
+
+    manifest = read_manifest(archive)
+    assert manifest["steps"][0]["alerts_above"] == [{"type": "Tip", "text": "Be quick"}]
+    assert manifest["steps"][0]["alerts_below"] == [{"type": "Note", "text": ""}]
+
+    loaded = load_project(archive, extract_to=str(tmp_path / "out"))
+    assert loaded[0]["title"] == "Open the menu"
+    assert loaded[0]["metadata"] == full_metadata()
+    assert open(loaded[0]["filename"], "rb").read() == b"not really a png"
+
+
+def test_missing_size_and_hash_are_filled_from_the_file(tmp_path):
+    Image = pytest.importorskip("PIL.Image")
+    image = str(tmp_path / "step_000.png")
+    Image.new("RGB", (64, 48)).save(image)
+    archive = str(tmp_path / "project.zip")
+    save_project([{"filename": image, "metadata": {"click_x": 5, "click_y": 6}}], archive)
+
+    metadata = read_manifest(archive)["steps"][0]["metadata"]
+    assert (metadata["width"], metadata["height"]) == (64, 48)
+    assert metadata["sha256"] == file_sha256(image)
+    assert (metadata["click_x"], metadata["click_y"]) == (5, 6)
+    assert metadata["captured_at"] is None
+
+
+def test_version_1_0_manifest_loads_with_empty_metadata(tmp_path):
+    archive = str(tmp_path / "old.zip")
+    manifest = {"version": "1.0", "steps": [{"filename": "step_000.png", "title": "Old step",
+                                             "alerts_above": [], "alerts_below": []}]}
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("manifest.json", json.dumps(manifest))
+        zf.writestr("step_000.png", b"old")
+
+    loaded = load_project(archive, extract_to=str(tmp_path / "out"))
+    assert loaded[0]["title"] == "Old step"
+    assert loaded[0]["metadata"] == {key: None for key in METADATA_KEYS}
@@ -0,0 +1,85 @@
+import os
+
+import pytest
+
+pytest.importorskip("PIL")
+pytest.importorskip("mss")
+pytest.importorskip("pynput")
+pytest.importorskip("PyQt5.QtCore")
+
+import recorder  # noqa: E402
+from spool import read_spool_index  # noqa: E402
+
+SETTINGS = {"highlight_size": 20, "highlight_color": [255, 0, 0, 128], "deferred_encode": False}
+
+
+class FakeShot:
+    def __init__(self, width=64, height=48):
+        self.width, self.height = width, height
+        self.size = (width, height)
+        self.raw = bytes([10, 20, 30, 255]) * (width * height)
+        self.rgb = bytes([30, 20, 10]) * (width * height)
+
+
+class FakeGrabber:
+    monitors = [None, {"left": 0, "top": 0, "width": 64, "height": 48}]
+
+    def grab(self, monitor):
+        return FakeShot()
+
+
+@pytest.fixture(autouse=True)
+def fake_screen(monkeypatch):
+    monkeypatch.setattr(recorder, "_grabber", FakeGrabber)
+
+
+def test_captures_are_numbered_in_order(tmp_path):
+    session = recorder.RecorderSession(tmp_path, SETTINGS)
+    session.start(listen=False)
+    files = session.capture_many([(1, 1), (2, 2), (3, 3)])
+    session.stop()
+
+    assert [os.path.basename(f) for f in files] == ["step_000.png", "step_001.png", "step_002.png"]
+    assert all(os.path.exists(f) for f in files)
+    assert [session.metadata[f]["click_x"] for f in files] == [1, 2, 3]
+
+
+def test_each_session_gets_its_own_default_folder(tmp_path, monkeypatch):
+    monkeypatch.setattr(recorder, "SCREENSHOT_DIR", tmp_path)
+    first = recorder.RecorderSession(settings=SETTINGS)
+    second = recorder.RecorderSession(settings=SETTINGS)
+
+    assert first.output_dir != second.output_dir
+    assert first.output_dir.parent == second.output_dir.parent == tmp_path
+    first.start(listen=False)
+    second.start(listen=False)
+    assert os.path.basename(first.capture(1, 1)) == os.path.basename(second.capture(1, 1)) == "step_000.png"
+
+
+def test_reset_removes_only_recorded_files(tmp_path):
+    (tmp_path / "notes.txt").write_text("keep me")
+    (tmp_path / "step_999.png").write_bytes(b"not ours")
+    session = recorder.RecorderSession(tmp_path, SETTINGS)
+    session.start(listen=False)
+    files = session.capture_many([(1, 1), (2, 2)])
+
+    session.reset()
+    assert not any(os.path.exists(f) for f in files)
+    assert sorted(os.listdir(tmp_path)) == ["notes.txt", "step_999.png"]
+    assert session.metadata == {} and session.screenshot_count == 0
+    assert os.path.basename(session.capture(5, 5)) == "step_000.png"
+
+
+def test_deferred_encode_keeps_the_spool_when_frames_fail(tmp_path, monkeypatch):
+    session = recorder.RecorderSession(tmp_path, SETTINGS, deferred=True)
+    session.start(listen=False)
+    files = session.capture_many([(1, 1), (2, 2)])
+
+    def partial_encode(path, entries, settings, max_workers=None):
+        return {entries[0]["filename"]: {"width": 64, "height": 48}}
+
+    monkeypatch.setattr(recorder, "encode_spool", partial_encode)
+    assert session.stop() == [files[1]]
+    assert list(session.metadata) == [files[0]]
+    assert session.spool_path.exists()
+    assert [e["filename"] for e in read_spool_index(session.spool_path)] == files
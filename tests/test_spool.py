@@ -0,0 +1,74 @@
+import mmap
+
+from spool import FrameSpool, read_spool_index, remove_spool
+
+
+def test_append_returns_consecutive_offsets(tmp_path):
+    spool = FrameSpool(tmp_path / "capture.spool", mmap.PAGESIZE * 4)
+    assert spool.append(b"a" * 10) == 0
+    assert spool.append(b"b" * 20) == 10
+    assert spool.size == 30
+    assert spool.capacity == mmap.PAGESIZE * 4
+    spool.close()
+
+
+def test_append_grows_by_doubling_and_keeps_data(tmp_path):
+    path = tmp_path / "capture.spool"
+    spool = FrameSpool(path, 1)
+    # Capacity is rounded up to one page.
+    assert spool.capacity == mmap.PAGESIZE
+
+    first = bytes(range(256)) * (mmap.PAGESIZE // 256)
+    second = b"\xff" * (mmap.PAGESIZE * 2 + 1)
+    assert spool.append(first) == 0
+    assert spool.capacity == mmap.PAGESIZE
+    assert spool.append(second) == mmap.PAGESIZE
+    # 3 pages + 1 byte needed: one page doubled twice.
+    assert spool.capacity == mmap.PAGESIZE * 4
+    spool.flush()
+
+    data = path.read_bytes()
+    assert len(data) == spool.capacity
+    assert data[:len(first)] == first
+    assert data[len(first):len(first) + len(second)] == second
+    spool.close()
+    assert not path.exists()
+
+
+def test_close_can_keep_the_file(tmp_path):
+    path = tmp_path / "capture.spool"
+    spool = FrameSpool(path, 16)
+    spool.append(b"frame")
+    spool.close(remove=False)
+    assert path.read_bytes().startswith(b"frame")
+
+
+def test_records_are_indexed_next_to_the_spool(tmp_path):
+    path = tmp_path / "capture.spool"
+    spool = FrameSpool(path, 16)
+    spool.append(b"abc", {"filename": "step_000.png"})
+    spool.append(b"defgh")
+    spool.append(b"ij", {"filename": "step_001.png"})
+    expected = [
+        {"filename": "step_000.png", "offset": 0, "length": 3},
+        {"filename": "step_001.png", "offset": 8, "length": 2},
+    ]
+    assert spool.entries == expected
+    # Readable by another process while the spool is still open.
+    assert read_spool_index(path) == expected
+
+    spool.close()
+    assert read_spool_index(path) == []
+    assert not (tmp_path / "capture.spool.idx").exists()
+
+
+def test_read_spool_index_ignores_a_torn_last_line(tmp_path):
+    path = tmp_path / "capture.spool"
+    spool = FrameSpool(path, 16)
+    spool.append(b"abc", {"filename": "step_000.png"})
+    spool.close(remove=False)
+    with open(spool.index_path, "a", encoding="utf-8") as fh:
+        fh.write('{"filename": "step_0')
+    assert [e["filename"] for e in read_spool_index(path)] == ["step_000.png"]
+    remove_spool(path)
+    assert not path.exists()